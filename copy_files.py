@@ -1,5 +1,6 @@
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from shutil import copy2
 from typing import List
 
@@ -11,29 +12,38 @@ def main(input_dir: str, suffix_list: List[str], output_dir: str):
     else:
         flist = to_filelist(input_dir)
 
-    files_to_output = [
-        fname
-        for fname in flist
-        if len([s for s in suffix_list if fname.endswith(s)]) > 0
-    ]
+    suffixes = tuple(suffix_list)
+    files_to_output = [fname for fname in flist if fname.endswith(suffixes)]
     print(f'{len(files_to_output)} files will be copied.')
 
-    for fname in files_to_output:
-        orig_file_path = os.path.join(input_dir, fname)
-        dest_file_path = os.path.join(output_dir, fname)
+    os.makedirs(output_dir, exist_ok=True)
+
+    def copy_one(fname):
+        copy2(os.path.join(input_dir, fname), os.path.join(output_dir, fname))
 
-        copy2(orig_file_path, dest_file_path)
+    # copy2 releases the GIL while data moves in the C layer, so threads
+    # keep the disk queue filled instead of copying one file at a time.
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        list(ex.map(copy_one, files_to_output))
 
     flist = to_filelist(output_dir)
     print(f'{len(flist)} files are saved in {output_dir}.')
     
 def to_filelist(dir_path):
     '''Return a file list in a given directory'''
-    l1 = os.listdir(dir_path)
-    l2= [a for a in l1 if not a.startswith('.')]
-    flist = [a for a in l2 if not a.startswith('0')]
+    fl_path = os.path.join(dir_path, '0.filelist')
+    # If the directory has not changed since the list was written,
+    # reuse the existing list instead of rewriting it.
+    if os.path.isfile(fl_path) and \
+            os.path.getmtime(fl_path) >= os.path.getmtime(dir_path):
+        return read_1D_list(fl_path)
 
-    with open(os.path.join(dir_path, '0.filelist'), 'w') as f:
+    flist = [
+        entry.name
+        for entry in os.scandir(dir_path)
+        if not entry.name.startswith(('.', '0'))
+    ]
+    with open(fl_path, 'w') as f:
         print('itemnum: '+str(len(flist)), file=f)
         print('\n'.join(flist), file=f)
     return flist
@@ -1,5 +1,7 @@
 
 import os
+import re
+import fnmatch
 from shutil import copy2
 from .functions import gen_find_file
 
@@ -16,24 +18,41 @@ def to_list_file(item_list, path):
 	    
 def to_filelist(dir_path):
     '''Return a file list in a given directory'''
-    l1 = os.listdir(dir_path)
-    l2= [a for a in l1 if not a.startswith('.')]
-    flist = [a for a in l2 if not a.startswith('0')]
-
-    with open(os.path.join(dir_path, '0.filelist'), 'w') as f:
+    fl_path = os.path.join(dir_path, '0.filelist')
+    # If the directory has not changed since the list was written,
+    # reuse the existing list instead of rewriting it.
+    if os.path.isfile(fl_path) and \
+            os.path.getmtime(fl_path) >= os.path.getmtime(dir_path):
+        return read_list(fl_path)
+
+    flist = [
+        entry.name
+        for entry in os.scandir(dir_path)
+        if not entry.name.startswith(('.', '0'))
+    ]
+    with open(fl_path, 'w') as f:
         print('itemnum: '+str(len(flist)), file=f)
         print('\n'.join(flist), file=f)
     return flist
 
 def search_file(query_list, top_dir, file_pattern_formatter):
-    for query_prefix in query_list:
-        file_pat = file_pattern_formatter(query_prefix)
-        found_cnt = 0
-
-        for from_path in gen_find_file(top_dir, file_pat):
-            yield from_path
-            found_cnt += 1
-        
+    # Compile every query's wildcard once so the tree is walked a single
+    # time and each file name is tested against all queries, instead of
+    # one full walk per query.
+    file_pats = [
+        file_pattern_formatter(query_prefix) for query_prefix in query_list
+    ]
+    matchers = [re.compile(fnmatch.translate(pat)).match for pat in file_pats]
+    found_cnts = [0] * len(file_pats)
+
+    for from_path in gen_find_file(top_dir, '*'):
+        name = os.path.basename(from_path)
+        for i, match in enumerate(matchers):
+            if match(name):
+                yield from_path
+                found_cnts[i] += 1
+
+    for file_pat, found_cnt in zip(file_pats, found_cnts):
         if found_cnt == 0:
             print(f'{file_pat} not found under {top_dir}.')
 
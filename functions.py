@@ -1,19 +1,70 @@
 """ Functions to help dealing with paths in tree structure. """
 
 import os
+import re
+import mmap
 import fnmatch
 
 def gen_find_file(top, filepat):
     '''Find all filenames in a directory tree that match a shell wildcard pattern'''
-    for path, _, filelist in os.walk(top):
-        for name in fnmatch.filter(filelist, filepat):
-            yield os.path.join(path, name)
+    match = re.compile(fnmatch.translate(filepat)).match
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and match(entry.name):
+                    yield entry.path
 
 def gen_find_dir(top, filepat):
-    """ Obtain all directory names in a directory tree that contain files 
+    """ Obtain all directory names in a directory tree that contain files
     matching to a shell wildcard pattern. This function allows you to process
     linearly through directories in tree structured file organization. """
-    for path, _, filelist in os.walk(top):
-        if len(fnmatch.filter(filelist, filepat)) > 0:
+    match = re.compile(fnmatch.translate(filepat)).match
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        found = False
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif not found and entry.is_file() and match(entry.name):
+                    found = True
+        if found:
             yield path
-            
\ No newline at end of file
+
+def gen_grep(pattern, lines):
+    """ Yield lines from an iterable that contain a match to a regex
+    pattern. Lines are yielded without a trailing newline, matching
+    grep_mmap. """
+    pat = re.compile(pattern)
+    for line in lines:
+        if pat.search(line):
+            yield line.rstrip('\n')
+
+def grep_mmap(pattern, path):
+    """ Yield lines in a file that contain a match to a regex pattern,
+    without their trailing newline. The file is memory-mapped and
+    scanned with finditer in one pass, which is much faster than a
+    Python-level line loop on large files. Use gen_grep for compressed
+    inputs or other line iterables. """
+    # mmap refuses zero-length files; an empty file has no matches
+    if os.path.getsize(path) == 0:
+        return
+    pat = re.compile(pattern.encode())
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        prev_end = -1
+        for m in pat.finditer(mm):
+            if m.start() < prev_end:
+                # Another match on a line that has been yielded already
+                continue
+            start = mm.rfind(b'\n', 0, m.start()) + 1
+            end = mm.find(b'\n', m.end())
+            if end == -1:
+                end = len(mm)
+            prev_end = end
+            yield mm[start:end].decode()
@@ -75,7 +75,12 @@ item. In this case, the order of members must be consistent across all the lines
 """
 
 import os
+import re
 import bz2
+import shutil
+import subprocess
+
+from concurrent.futures import ProcessPoolExecutor
 
 from typing import List
 from datetime import datetime
@@ -84,25 +89,91 @@ from pathmanage import __version__
 from nothingspecial.text import to_filelist
 from nothingspecial.keeplog import save_proc_setting_as_file
 
-def compress_all_files(input_dir, suffix, output_dir):
-    """Read the entire file on memory and save into bzip file. 
-    For large file, we can add another option for read and output in chunk. 
-    lzma may be a good module for this possibility. 
-    This web article has a good demonstration:
-    https://towardsdatascience.com/all-the-ways-to-compress-and-archive-files-in-python-e8076ccedb4b 
-
+# zstandard compresses ASCII text at a similar ratio to bzip2 but many
+# times the throughput, so it is the preferred codec when installed.
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+CODEC_SUFFIXES = {'zstd': '.zst', 'bz2': '.bz2'}
+
+def _advise_sequential(fh):
+    """ Hint the kernel that the file will be read front to back, so it
+    can read ahead more aggressively. No-op where unsupported. """
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+def _compress_bz2(in_fh, out_fpath):
+    """ Compress a stream to a bz2 file. The stdlib bz2 module is
+    strictly single-threaded, so pipe through lbzip2 when it is on PATH
+    to compress the blocks of one file across all cores. The output is
+    a regular bz2 file either way. """
+    lbzip2 = shutil.which('lbzip2')
+
+    if lbzip2 is None:
+        with bz2.open(out_fpath, 'wb') as out_fh:
+            shutil.copyfileobj(in_fh, out_fh, length=1024*1024)
+        return
+
+    with open(out_fpath, 'wb') as raw_out:
+        proc = subprocess.Popen(
+            [lbzip2, '-c', '-n', str(os.cpu_count())],
+            stdin=subprocess.PIPE, stdout=raw_out
+        )
+        shutil.copyfileobj(in_fh, proc.stdin, 1024*1024)
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(
+                f'lbzip2 exited with code {proc.returncode} for {out_fpath}')
+
+def _compress_one(args):
+    """ Compress one input file into its output path. Runs in a worker
+    process of compress_all_files. """
+    in_fpath, out_fpath, codec = args
+    with open(in_fpath, 'rb', buffering=1024*1024) as in_fh:
+        _advise_sequential(in_fh)
+        # Stream in 1 MiB chunks so memory stays bounded no matter
+        # how large the input file is.
+        if codec == 'zstd':
+            cctx = zstd.ZstdCompressor(level=6, threads=-1)
+            with open(out_fpath, 'wb') as raw_out, \
+                    cctx.stream_writer(raw_out) as out_fh:
+                shutil.copyfileobj(in_fh, out_fh, length=1024*1024)
+        else:
+            _compress_bz2(in_fh, out_fpath)
+    return out_fpath
+
+def compress_all_files(input_dir, suffix, output_dir, codec='zstd'):
+    """Compress every file in input_dir whose name ends with suffix into
+    output_dir, streaming each file in 1 MiB chunks so memory stays
+    bounded regardless of file size. Files are compressed in parallel
+    worker processes. codec selects 'zstd' (default, .zst output,
+    requires the optional zstandard package; falls back to bz2 when it
+    is not installed) or 'bz2' (.bz2 output, through lbzip2 when it is
+    on PATH). Progress is recorded in 0.log.txt in output_dir.
     """
     start = datetime.now().isoformat()
+
+    if codec not in CODEC_SUFFIXES:
+        raise ValueError(f'Please choose codec from {set(CODEC_SUFFIXES)}')
+    if codec == 'zstd' and zstd is None:
+        # Fall back to the standard library when zstandard is missing
+        codec = 'bz2'
+
     input_args = {
-        'input_dir': input_dir, 
+        'input_dir': input_dir,
         'suffix': suffix,
-        'output_dir': output_dir
+        'output_dir': output_dir,
+        'codec': codec
     }
     if not os.path.isdir(output_dir):
         os.mkdir(output_dir)
         
     log_file = os.path.join(output_dir, '0.log.txt')
-    with open(log_file, 'a') as log_fh:
+    # One log handle for the whole run; line buffered so progress is
+    # visible while files are still being compressed.
+    with open(log_file, 'a', buffering=1) as log_fh:
         save_proc_setting_as_file(
             log_fh, 
             package_name = 'pathmanage', 
@@ -114,29 +185,32 @@ def compress_all_files(input_dir, suffix, output_dir):
         )
         print('\n[Process log]', file=log_fh)
 
-    in_fnames = [
-        fname 
-        for fname in os.listdir(input_dir) 
-        if fname.endswith(suffix)
-    ]
-    in_fpaths = [os.path.join(input_dir, fname) for fname in in_fnames]
-    out_fnames = [
-        fname + '.bz2'
-        for fname in in_fnames
-    ]
-    out_fpaths = [os.path.join(output_dir, fname) for fname in out_fnames]
-
-    for in_fpath, out_fpath in zip(in_fpaths, out_fpaths):
-        with open(in_fpath, 'rb') as in_fh, bz2.open(out_fpath, 'wb') as out_fh:
-            out_fh.write(in_fh.read())
-
-            with open(log_file, 'a') as log_fh:
-                print(f'\nOutput {out_fpath}')
-
-    out_flist = to_filelist(output_dir)
-
-    with open(log_file, 'a') as log_fh:
-        print(f'A total of {len(out_flist)} files are saved.')
+        # os.scandir hands back the name and the joined path in one
+        # pass, with the file check served from cached entry data.
+        in_files = [
+            (entry.name, entry.path)
+            for entry in os.scandir(input_dir)
+            if entry.name.endswith(suffix) and entry.is_file()
+        ]
+        in_fpaths = [path for _, path in in_files]
+        out_fpaths = [
+            os.path.join(output_dir, name + CODEC_SUFFIXES[codec])
+            for name, _ in in_files
+        ]
+
+        # Compression is CPU bound, so the files are compressed in
+        # parallel worker processes. Log writes stay on the main process
+        # to keep them serialized.
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for out_fpath in ex.map(
+                    _compress_one,
+                    ((i, o, codec) for i, o in zip(in_fpaths, out_fpaths)),
+                    chunksize=1):
+                print(f'\nOutput {out_fpath}', file=log_fh)
+
+        out_flist = to_filelist(output_dir)
+
+        print(f'A total of {len(out_flist)} files are saved.', file=log_fh)
 
     return out_flist
 
@@ -150,12 +224,19 @@ def split(
     
     start = datetime.now().isoformat()
 
-    # In case that user wants to remove prefixes that appear consistently 
-    # accross lines
+    # In case that user wants to remove prefixes that appear consistently
+    # accross lines. Prefixes and the separator are encoded once so the
+    # hot loop compares bytes without decoding each line.
     member_num = len(item_prefixes)
-    contents = [] # Strings in this list will be output in the same file
+    prefix_bytes = tuple(p.encode() for p in item_prefixes)
+    sep_bytes = item_separator.encode()
+    # One anchored regex strips all prefixes of a data line in a single
+    # C-level match; each group captures one item without its prefix.
+    prefix_pat = re.compile(
+        rb'\s+'.join(re.escape(p) + rb'(\S*)' for p in prefix_bytes)
+    ) if member_num > 0 else None
     output_file_id = 1
-    first_level_id = ''
+    first_level_id = b''
     second_level_item_num = 0
     total_line_count = 0
     total_file_count = 0
@@ -169,7 +250,15 @@ def split(
         'item_separator': item_separator
     }
     log_file = get_output_file_path(output_file_prefix, 'log')
-    with open(log_file, 'a') as log_fh:
+    # Pre-flight check; the data files themselves are opened with 'x'
+    # which fails atomically, so no stat is needed per file switch.
+    if os.path.isfile(log_file):
+        raise FileExistsError(log_file)
+
+    # The log handle stays open for the whole run so file switches
+    # do not pay an open/close per output file. Line buffered, so
+    # progress is visible while the run is still going.
+    with open(log_file, 'a', buffering=1) as log_fh:
         save_proc_setting_as_file(
             log_fh, 
             package_name = 'pathmanage', 
@@ -181,138 +270,130 @@ def split(
         )
         print('\n[Process log]', file=log_fh)
 
-    current_output_file_path = get_output_file_path(
-        output_file_prefix, output_file_id
-    )
-
-    # Get a file handler of the input file
-    with open(input_file, 'r') as input_fh:
-        # Access to each line from the top
-        for l in input_fh:
-            # Cut empty characters at the both ends.  
-            line = l.strip()
-            
-            if line == '':
-                continue
-
-            # If the current line indicates the first level ID
-            if line.startswith('>>'):
-                # If the current line is not the first item
-                if first_level_id != '':
-                    # Output contents in output_lines to a file. 
-                    current_output_file_path, contents = \
-                        save_to_file_and_switch_output_file(
-                            contents, current_output_file_path, 
-                            output_file_prefix,
-                            log_file, 
-                            comment_line = ''
-                        )
-                    total_file_count += 1
-                    second_level_item_num = 0
-                
-                first_level_id = line
-
-            # If the current line indicates the second level ID
-            elif line.startswith('>'):
-                # If the number of second level ids is greater than a given value
-                if second_level_item_num >= max_item_num:
-                    # Output contents in output_lines to a file. 
-                    current_output_file_path, contents = \
-                        save_to_file_and_switch_output_file(
-                            contents, current_output_file_path, 
-                            output_file_prefix, 
-                            log_file,
-                            comment_line = ''
-                        )
-                    # If contents for one first level id are split into several,
-                    # Add the first level ID at the beginning in the next file. 
-                    contents = [first_level_id]
-                    total_file_count += 1
-                    second_level_item_num = 0
-
-                second_level_item_num += 1
-            
-            # If the current line indicates data
-            else:
-                if member_num > 0:
-                    # Split a line to 
-                    parts = line.split()
-                    # Check if the number of items matches to the expectation
-                    assert len(parts) == member_num
-
-                    modified_items = [
-                        ''.join(item.split(exp_pref)[1:]) # Remove prefix
-                        for exp_pref, item in zip(item_prefixes, parts)
-                        if item.startswith(exp_pref)
-                     ]
-                    if len(modified_items) != member_num:
-                        msg = 'There is one or more items that do not start '\
-                              f'with expected prefixes: \nObserved items: '\
-                              f'{parts}\nExpected prefixes: {item_prefixes}'
-                        with open(log_file, 'a') as log_f:
-                            print(msg, file=log_f)
-                        raise ValueError(msg)
-                    
-                    line = item_separator.join(modified_items)
-
-            contents.append(line)
-            total_line_count += 1
-    
-    # Output the remaining items
-    current_output_file_path, contents = save_to_file_and_switch_output_file(
-        contents, 
-        current_output_file_path, 
-        output_file_prefix, 
-        log_file,
-        comment_line = ''
-    )
-    total_file_count += 1
-    
-    with open(log_file, 'a') as log_f:
+        current_output_file_path = get_output_file_path(
+            output_file_prefix, output_file_id
+        )
+        # Lines are streamed to this handle as they are accepted, so memory
+        # stays O(1) instead of holding a whole output file in a list.
+        out_fh = open(current_output_file_path, 'xb', buffering=1<<20)
+
+        # Bind per-line lookups to locals once; a local read is a
+        # LOAD_FAST instead of an attribute lookup on every line.
+        out_write = out_fh.write
+        fullmatch = prefix_pat.fullmatch if prefix_pat is not None else None
+        sep_join = sep_bytes.join
+
+        # Get a file handler of the input file. Binary mode skips the UTF-8
+        # decode for lines that are passed through unmodified.
+        with open(input_file, 'rb', buffering=1<<20) as input_fh:
+            _advise_sequential(input_fh)
+            # Access to each line from the top
+            for l in input_fh:
+                # Cut empty characters at the both ends.
+                line = l.strip()
+
+                if line == b'':
+                    continue
+
+                # ID lines start with '>'; testing the first byte once is
+                # cheaper than two startswith calls on every data line.
+                if line[:1] == b'>':
+                    # If the current line indicates the first level ID
+                    if line[:2] == b'>>':
+                        # If the current line is not the first item
+                        if first_level_id != b'':
+                            # Close the current file and open the next one.
+                            current_output_file_path, output_file_id, out_fh = \
+                                save_to_file_and_switch_output_file(
+                                    out_fh, current_output_file_path,
+                                    output_file_id,
+                                    output_file_prefix,
+                                    log_fh
+                                )
+                            out_write = out_fh.write
+                            total_file_count += 1
+                            second_level_item_num = 0
+
+                        first_level_id = line
+
+                    # If the current line indicates the second level ID
+                    else:
+                        # If the number of second level ids is greater than a given value
+                        if second_level_item_num >= max_item_num:
+                            # Close the current file and open the next one.
+                            current_output_file_path, output_file_id, out_fh = \
+                                save_to_file_and_switch_output_file(
+                                    out_fh, current_output_file_path,
+                                    output_file_id,
+                                    output_file_prefix,
+                                    log_fh
+                                )
+                            out_write = out_fh.write
+                            # If contents for one first level id are split into several,
+                            # Add the first level ID at the beginning in the next file.
+                            out_write(first_level_id)
+                            out_write(b'\n')
+                            total_file_count += 1
+                            second_level_item_num = 0
+
+                        second_level_item_num += 1
+
+                # If the current line indicates data
+                else:
+                    if fullmatch is not None:
+                        m = fullmatch(line)
+                        # The match fails when an item misses its
+                        # prefix or the member number is off.
+                        if m is None:
+                            msg = 'There is one or more items that do not start '\
+                                  f'with expected prefixes: \nObserved items: '\
+                                  f'{[p.decode() for p in line.split()]}'\
+                                  f'\nExpected prefixes: {item_prefixes}'
+                            print(msg, file=log_fh)
+                            raise ValueError(msg)
+
+                        line = sep_join(m.groups())
+
+                out_write(line)
+                out_write(b'\n')
+                total_line_count += 1
+
+        # Close the last output file
+        out_fh.close()
+        print(f'Save contents to {current_output_file_path}.\n', file=log_fh)
+        total_file_count += 1
+
         print(f'A total of {total_line_count} (except empty lines) lines are '\
-              f'recognized.', file=log_f)
-        print(f'These lines are saved separately into {total_file_count} files.', 
-              file=log_f)
+              f'recognized.', file=log_fh)
+        print(f'These lines are saved separately into {total_file_count} files.',
+              file=log_fh)
+
 
     return total_line_count, total_file_count
 
 def save_to_file_and_switch_output_file(
-        contents                    : List[str], 
+        out_fh,
         current_output_file_path    : str,
-        output_file_prefix          : str, 
-        log_file                    : str, 
-        comment_line                : str = ''
+        current_output_file_id      : int,
+        output_file_prefix          : str,
+        log_fh
         ):
-    # Output the contents to the current file
-    with open(current_output_file_path, 'w') as f:
-        if comment_line != '':
-            print(comment_line, file=f)
+    # The contents have been streamed to the current file already;
+    # closing it flushes the remaining buffer.
+    out_fh.close()
 
-        print('\n'.join(contents), file=f)
+    print(f'Save contents to {current_output_file_path}.\n', file = log_fh)
 
-    with open(log_file, 'a') as log_f:
-        print(f'Save contents to {current_output_file_path}.\n', file = log_f)
-    
-    # Get the next output file path
-    curr_output_file_id = get_output_file_id_from_path(current_output_file_path)
-    next_id = curr_output_file_id + 1
+    # Get the next output file path; the caller keeps the id counter
+    next_id = current_output_file_id + 1
     next_output_file_path = get_output_file_path(output_file_prefix, next_id)
 
-    # Empty the contents
-    contents = []
-    return next_output_file_path, contents
+    return next_output_file_path, next_id, \
+        open(next_output_file_path, 'xb', buffering=1<<20)
 
 def get_output_file_path(output_file_prefix, output_file_id):
-    output_file_path = output_file_prefix + f'_{output_file_id}.txt'
-
-    # Check if the file does not exist
-    if os.path.isfile(output_file_path):
-        raise FileExistsError(output_file_path)
-    
-    return output_file_path
+    return output_file_prefix + f'_{output_file_id}.txt'
 
-def get_output_file_id_from_path(file_path):
-    return int(file_path.split('_')[-1].split('.')[0])
 
 if __name__ == '__main__':
     import sys